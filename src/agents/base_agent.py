@@ -1,22 +1,93 @@
 
+import asyncio
+import functools
+import hashlib
+import re
+import unicodedata
+from collections import OrderedDict
+import httpx
 from langchain_openai import ChatOpenAI
 from utils.config import get_instance as get_config
 
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 所有 ChatOpenAI 实例共用的 HTTP 客户端, 复用与模型服务之间的长连接, 避免每次调用重新建立 TCP/TLS 连接
+_http_limits = httpx.Limits(max_keepalive_connections=64, max_connections=128)
+_http_client = httpx.Client(limits=_http_limits)
+_http_async_client = httpx.AsyncClient(http2=True, limits=_http_limits)
+
+async def close():
+    """关闭共用的 HTTP 客户端, 在服务退出时调用"""
+    await _http_async_client.aclose()
+    _http_client.close()
+
+@functools.lru_cache(maxsize=1)
+def _ai_creds() -> tuple[str, str, str]:
+    # 配置在进程内不会变化, 只解析一次
+    config = get_config()
+    return (
+        config.get("ai", "llm_api_url"),
+        config.get("ai", "llm_api_key"),
+        config.get("ai", "llm_model_name"),
+    )
+
 class BaseAgent:
     def __init__(self, api_url: str = None, api_key: str = None, model_name: str = None):
         config = get_config()
-        llm_api_url = api_url or config.get("ai", "llm_api_url")
-        llm_api_key = api_key or config.get("ai", "llm_api_key")
-        llm_model_name = model_name or config.get("ai", "llm_model_name")
+        llm_api_url, llm_api_key, llm_model_name = api_url, api_key, model_name
+        if not (api_url and api_key and model_name):
+            conf_api_url, conf_api_key, conf_model_name = _ai_creds()
+            llm_api_url = api_url or conf_api_url
+            llm_api_key = api_key or conf_api_key
+            llm_model_name = model_name or conf_model_name
+        # 未配置时使用模型服务的默认 temperature
+        self.temperature = config.getfloat("ai", "llm_temperature", fallback=None)
         self.llm = ChatOpenAI(
             openai_api_key=llm_api_key,
             openai_api_base=llm_api_url,
             model_name=llm_model_name,
+            temperature=self.temperature,
+            http_client=_http_client,
+            http_async_client=_http_async_client,
         )
-    pass
+        self.model_name = llm_model_name
+        # LLM 响应缓存, 相同模型 + 提示词 + 输入直接复用上次的结果, 0 表示关闭
+        # 只有 temperature 为 0 时输出才可复现, 否则缓存会一直重放第一次的结果, 因此不缓存
+        self.cache_size = config.getint("ai", "llm_cache_size", fallback=1024) if self.temperature == 0 else 0
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        # 正在进行中的 LLM 调用, 相同 key 的并发请求共用同一次调用
+        self._inflight: dict[str, asyncio.Task] = {}
 
+    @staticmethod
+    def _normalize_input(text: str) -> str:
+        # 全角转半角并折叠空白, 让重新录入或 OCR 得到的近似文本命中同一条缓存
+        return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
 
-class SummaryPeopleAgent(BaseAgent):
-    def __init__(self):
-        super().__init__()
-    pass
\ No newline at end of file
+    def _cache_key(self, *parts: str) -> str:
+        raw = "\0".join([self.model_name, *parts])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _invoke_once(self, key: str, prompt) -> str:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self.llm.ainvoke(prompt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield 避免某个请求被取消时连带取消其他等待同一结果的请求
+        response = await asyncio.shield(task)
+        return response.content
+
+    def _cache_get(self, key: str) -> str:
+        content = self._cache.get(key)
+        if content is not None:
+            self._cache.move_to_end(key)
+        return content
+
+    def _cache_put(self, key: str, content: str):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = content
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    pass
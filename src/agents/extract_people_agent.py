@@ -1,52 +1,83 @@
 
 import datetime
-import json
 import logging
-from langchain.prompts import ChatPromptTemplate
+import orjson
+from langchain_core.messages import HumanMessage, SystemMessage
 
 from .base_agent import BaseAgent
 from models.people import People
+from utils.config import get_instance as get_config
+
+# 指令部分保持字节级不变放在最前, 便于命中模型服务的提示词前缀缓存; 日期放在其后单独的消息中
+_SYSTEM_PROMPT = (
+    "你是一个专业的婚姻、交友助手，善于从一段文字描述中，精确获取用户的以下信息：\n"
+    "姓名 name\n"
+    "性别 gender\n"
+    "年龄 age\n"
+    "身高(cm) height\n"
+    "婚姻状况 marital_status\n"
+    "择偶要求 match_requirement\n"
+    "以上信息需要严格按照 JSON 格式输出 字段名与条目中英文保持一致; 若未识别到以上的某项，则不返回该字段，不要自行填写“未知”，“未填写”等类似字眼。\n"
+    "其中，'年龄 age' 和 '身高(cm) height' 必须是一个整数，不能是一个字符串；\n"
+    "并且，'性别 gender' 根据识别结果，必须从 男,女,未知 三选一填写。\n"
+    "除了上述基本信息，还有一个字段\n"
+    "个人介绍 introduction\n"
+    "其余的信息需要按照字典的方式进行提炼和总结，都放在个人介绍字段中\n"
+    "个人介绍的字典的 key 需要使用提炼好的中文。\n"
+)
+_SYSTEM_MESSAGE = SystemMessage(content=_SYSTEM_PROMPT)
 
 class ExtractPeopleAgent(BaseAgent):
     def __init__(self, api_url: str = None, api_key: str = None, model_name: str = None):
         super().__init__(api_url, api_key, model_name)
-        self.prompt = ChatPromptTemplate.from_messages([
-            (
-                "system",
-                f"现在是{datetime.datetime.now().strftime('%Y-%m-%d')}，"
-                "你是一个专业的婚姻、交友助手，善于从一段文字描述中，精确获取用户的以下信息：\n"
-                "姓名 name\n"
-                "性别 gender\n"
-                "年龄 age\n"
-                "身高(cm) height\n"
-                "婚姻状况 marital_status\n"
-                "择偶要求 match_requirement\n"
-                "以上信息需要严格按照 JSON 格式输出 字段名与条目中英文保持一致; 若未识别到以上的某项，则不返回该字段，不要自行填写“未知”，“未填写”等类似字眼。\n"
-                "其中，'年龄 age' 和 '身高(cm) height' 必须是一个整数，不能是一个字符串；\n"
-                "并且，'性别 gender' 根据识别结果，必须从 男,女,未知 三选一填写。\n"
-                "除了上述基本信息，还有一个字段\n"
-                "个人介绍 introduction\n"
-                "其余的信息需要按照字典的方式进行提炼和总结，都放在个人介绍字段中\n"
-                "个人介绍的字典的 key 需要使用提炼好的中文。\n"
-            ),
-            ("human", "{input}")
-        ])
+        # JSON 模式下由模型服务保证输出为合法 JSON, 不支持该参数的服务可在配置中关闭
+        if get_config().getboolean("ai", "llm_json_mode", fallback=True):
+            self.llm = self.llm.bind(response_format={"type": "json_object"})
+        self._date_message: SystemMessage = None
+        self._date_message_date: datetime.date = None
+
+    @property
+    def date_message(self) -> SystemMessage:
+        # 当天日期的提示消息, 每天只渲染一次
+        today = datetime.date.today()
+        if self._date_message_date != today:
+            self._date_message = SystemMessage(content=f"现在是{today.strftime('%Y-%m-%d')}。")
+            self._date_message_date = today
+        return self._date_message
     
-    def extract_people_info(self, text: str) -> People:
+    async def extract_people_info(self, text: str) -> People:
         """从文本中提取个人信息"""
-        prompt = self.prompt.format_prompt(input=text)
-        response = self.llm.invoke(prompt)
-        logging.info(f"llm response: {response.content}")
+        date_message = self.date_message
+        key = self._cache_key(_SYSTEM_PROMPT, date_message.content, self._normalize_input(text))
+        content = self._cache_get(key)
+        if content is None:
+            messages = [_SYSTEM_MESSAGE, date_message, HumanMessage(content=text)]
+            content = await self._invoke_once(key, messages)
+            logging.debug("llm response: %s", content)
+        else:
+            logging.info("llm response hit cache: %s", key)
         try:
-            people = People.from_dict(json.loads(response.content))
+            people = People.from_dict(orjson.loads(content))
             err = people.validate()
             if not err.success:
                 raise ValueError(f"Failed to validate people info: {err.info}")
+            self._cache_put(key, content)
             return people
-        except json.JSONDecodeError:
-            logging.error(f"Failed to parse JSON from LLM response: {response.content}")
+        except orjson.JSONDecodeError:
+            logging.error("Failed to parse JSON from LLM response: %s", content)
             return None
         except ValueError as e:
-            logging.error(f"Failed to validate people info: {e}")
+            logging.error("Failed to validate people info: %s", e)
             return None
     pass
+
+
+_extract_people_agent: ExtractPeopleAgent = None
+
+def init():
+    global _extract_people_agent
+    _extract_people_agent = ExtractPeopleAgent()
+
+def get_instance() -> ExtractPeopleAgent:
+    global _extract_people_agent
+    return _extract_people_agent
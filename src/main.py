@@ -3,19 +3,18 @@
 import os
 import argparse
 import uvicorn
+from agents import extract_people_agent
 from services import people as people_service
 from utils import config, logger, obs, ocr, rldb
 
 from web.api import api
 
-# 主函数
-def main():
-    main_path = os.path.dirname(os.path.abspath(__file__))
-    parser = argparse.ArgumentParser(description='IF.u 服务')
-    parser.add_argument('--config', type=str, default=os.path.join(main_path, '../configuration/test_conf.ini'), help='配置文件路径')
-    args = parser.parse_args()
-    
-    config.init(args.config)
+# 多 worker 模式下通过环境变量把配置文件路径传给各个 worker 进程
+CONFIG_ENV = 'IFU_SERVICE_CONFIG'
+
+# 初始化配置、日志及各个单例
+def init(config_file: str):
+    config.init(config_file)
     logger.init()
     
     rldb.init()
@@ -24,12 +23,33 @@ def main():
     obs.init()
     
     people_service.init()
+    extract_people_agent.init()
+
+# 多 worker 模式下由每个 worker 进程调用, 各自建立数据库连接池和 LLM 客户端
+def create_app():
+    init(os.environ[CONFIG_ENV])
+    return api
+
+# 主函数
+def main():
+    main_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description='IF.u 服务')
+    parser.add_argument('--config', type=str, default=os.path.join(main_path, '../configuration/test_conf.ini'), help='配置文件路径')
+    args = parser.parse_args()
     
+    config.init(args.config)
     conf = config.get_instance()
 
     host = conf.get('web_service', 'server_host', fallback='0.0.0.0')
     port = conf.getint('web_service', 'server_port', fallback=8099)
+    workers = conf.getint('web_service', 'workers', fallback=1)
+    if workers > 1:
+        os.environ[CONFIG_ENV] = os.path.abspath(args.config)
+        uvicorn.run("main:create_app", factory=True, host=host, port=port, workers=workers)
+        return
+
+    init(args.config)
     uvicorn.run(api, host=host, port=port)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
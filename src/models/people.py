@@ -1,17 +1,50 @@
 # -*- coding: utf-8 -*-
 # created by mmmy on 2025-09-30
 
-import json
 import logging
-from typing import Dict
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, func
-from utils.rldb import RLDBBaseModel
-from utils.error import ErrorCode, error
+import operator
+from typing import Dict, Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Text
+from utils.rldb import JSONText, RLDBBaseModel
+from utils.error import OK, error
+
+# 合法的性别取值
+_GENDERS = frozenset(('男', '女', '未知'))
+
+# 校验规则: (字段名, 是否非法, 非法时使用的默认值, 日志)
+_PEOPLE_RULES = (
+    ('name', lambda v: not v, '', "Name is required, use default"),
+    ('gender', lambda v: v not in _GENDERS, '未知', "Gender must be '男', '女', or '未知', use default"),
+    ('age', lambda v: not isinstance(v, int) or v < 0, 0, "Age must be an integer and greater than 0, use default"),
+    ('height', lambda v: not isinstance(v, int) or v < 0, 0, "Height must be an integer and greater than 0, use default"),
+)
+
+# to_dict 输出的字段顺序, introduction 及之前的字段原样取值
+_PEOPLE_KEYS = ('id', 'name', 'contact', 'gender', 'age', 'height', 'marital_status',
+                'match_requirement', 'introduction', 'comments', 'cover', 'created_at')
+_PEOPLE_GET = operator.attrgetter(*_PEOPLE_KEYS[:-3])
+# 关系数据库模型及 Core 行映射的全部字段, 顺序与 People 的字段定义一致
+_PEOPLE_RLDB_GET = operator.attrgetter(*_PEOPLE_KEYS)
+_PEOPLE_MAPPING_GET = operator.itemgetter(*_PEOPLE_KEYS)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def _timestamp(dt: datetime) -> int:
+    # 带时区的时间直接与 epoch 相减, 不带时区的按本地时间换算, 已是整数的原样返回
+    if dt is None or isinstance(dt, int):
+        return dt
+    if dt.tzinfo is not None:
+        return int((dt - _EPOCH).total_seconds())
+    return int(dt.timestamp())
 
 class PeopleRLDBModel(RLDBBaseModel):
     __tablename__ = 'peoples'
-    id = Column(String(36), primary_key=True)
+    # 写入后不回读 server_default 生成的时间戳, 保存路径只用到 id
+    # 注意: 写入后不能从传入的实例上读取这两个时间戳, insert 之后访问会抛 DetachedInstanceError,
+    # upsert(merge) 之后传入的实例未被会话管理, 值始终为 None; 需要时请重新 get
+    __mapper_args__ = {"eager_defaults": False}
     name = Column(String(255), index=True)
     contact = Column(String(255), index=True)
     gender = Column(String(10))
@@ -19,29 +52,21 @@ class PeopleRLDBModel(RLDBBaseModel):
     height = Column(Integer)
     marital_status = Column(String(20))
     match_requirement = Column(Text)
-    introduction = Column(Text)
-    comments = Column(Text)
+    introduction = Column(JSONText)
+    comments = Column(JSONText)
     cover = Column(String(255), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
-    deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)
 
 
+@dataclass(slots=True)
 class Comment:
     # 评论内容
-    content: str
+    content: str = ''
     # 评论人
-    author: str
+    author: str = ''
     # 创建时间
-    created_at: datetime
+    created_at: datetime = field(default_factory=datetime.now)
     # 更新时间
-    updated_at: datetime
-
-    def __init__(self, **kwargs):
-        self.content = kwargs.get('content', '')
-        self.author = kwargs.get('author', '')
-        self.created_at = kwargs.get('created_at', datetime.now())
-        self.updated_at = kwargs.get('updated_at', datetime.now())
+    updated_at: datetime = field(default_factory=datetime.now)
 
     def to_dict(self) -> dict:
         return {
@@ -55,49 +80,51 @@ class Comment:
     def from_dict(cls, data: dict):
         data['created_at'] = datetime.fromtimestamp(data['created_at'])
         data['updated_at'] = datetime.fromtimestamp(data['updated_at'])
-        return cls(**data)
+        return cls(**{k: v for k, v in data.items() if k in _COMMENT_FIELDS})
 
+# from_dict 只接受的字段名, 导入时计算一次
+_COMMENT_FIELDS = frozenset(Comment.__dataclass_fields__)
 
+
+@dataclass(slots=True)
 class People:
     # 数据库 ID
-    id: str
+    id: str = ''
     # 姓名
-    name: str
+    name: str = ''
     # 联系人
-    contact: str
+    contact: str = ''
     # 性别
-    gender: str
+    gender: str = ''
     # 年龄
-    age: int
+    age: int = 0
     # 身高(cm)
-    height: int
+    height: int = 0
     # 婚姻状况
-    marital_status: str
+    marital_status: str = ''
     # 择偶要求
-    match_requirement: str
+    match_requirement: str = ''
     # 个人介绍
-    introduction: Dict[str, str]
+    introduction: Dict[str, str] = field(default_factory=dict)
     # 总结评价
-    comments: Dict[str, "Comment"]
+    comments: Dict[str, "Comment"] = field(default_factory=dict)
     # 封面
     cover: str = None
     # 创建时间
     created_at: datetime = None
-    
-    def __init__(self, **kwargs):
-        # 初始化所有属性，从kwargs中获取值，如果不存在则设置默认值
-        self.id = kwargs.get('id', '') if kwargs.get('id', '') is not None else ''
-        self.name = kwargs.get('name', '') if kwargs.get('name', '') is not None else ''
-        self.contact = kwargs.get('contact', '') if kwargs.get('contact', '') is not None else ''
-        self.gender = kwargs.get('gender', '') if kwargs.get('gender', '') is not None else ''
-        self.age = kwargs.get('age', 0) if kwargs.get('age', 0) is not None else 0
-        self.height = kwargs.get('height', 0) if kwargs.get('height', 0) is not None else 0
-        self.marital_status = kwargs.get('marital_status', '') if kwargs.get('marital_status', '') is not None else ''
-        self.match_requirement = kwargs.get('match_requirement', '') if kwargs.get('match_requirement', '') is not None else ''
-        self.introduction = kwargs.get('introduction', {}) if kwargs.get('introduction', {}) is not None else {}
-        self.comments = kwargs.get('comments', {}) if kwargs.get('comments', {}) is not None else {}
-        self.cover = kwargs.get('cover', None) if kwargs.get('cover', None) is not None else None
-        self.created_at = kwargs.get('created_at', None)
+
+    def __post_init__(self):
+        # 显式传入 None 的字段使用默认值
+        self.id = self.id if self.id is not None else ''
+        self.name = self.name if self.name is not None else ''
+        self.contact = self.contact if self.contact is not None else ''
+        self.gender = self.gender if self.gender is not None else ''
+        self.age = self.age if self.age is not None else 0
+        self.height = self.height if self.height is not None else 0
+        self.marital_status = self.marital_status if self.marital_status is not None else ''
+        self.match_requirement = self.match_requirement if self.match_requirement is not None else ''
+        self.introduction = self.introduction if self.introduction is not None else {}
+        self.comments = self.comments if self.comments is not None else {}
 
     def __str__(self) -> str:
         # 返回对象的字符串表示，包含所有属性
@@ -108,77 +135,55 @@ class People:
 
     @classmethod
     def from_dict(cls, data: dict):
-        if 'updated_at' in data:
-            # 移除 updated_at 字段，避免类型错误
-            del data['updated_at']
-        if 'deleted_at' in data:
-            # 移除 deleted_at 字段，避免类型错误
-            del data['deleted_at']
-        return cls(**data)
+        # 只取 People 定义的字段, 忽略 updated_at、deleted_at 等其他字段
+        return cls(**{k: v for k, v in data.items() if k in _PEOPLE_FIELDS})
 
     @classmethod
     def from_rldb_model(cls, data: PeopleRLDBModel):
         # 将关系数据库模型转换为对象
+        return cls._from_values(_PEOPLE_RLDB_GET(data))
+
+    @classmethod
+    def from_mapping(cls, data: Mapping):
+        # 将 Core 查询得到的行映射转换为对象, JSON 字段已由列类型解析
+        return cls._from_values(_PEOPLE_MAPPING_GET(data))
+
+    @classmethod
+    def _from_values(cls, values: tuple):
+        # values 按 _PEOPLE_KEYS 的顺序排列
+        *fields, introduction, comments, cover, created_at = values
         return cls(
-            id=data.id,
-            name=data.name,
-            contact=data.contact,
-            gender=data.gender,
-            age=data.age,
-            height=data.height,
-            marital_status=data.marital_status,
-            match_requirement=data.match_requirement,
-            introduction=json.loads(data.introduction) if data.introduction else {},
-            comments={k: Comment.from_dict(v) for k, v in json.loads(data.comments).items()} if data.comments else {},
-            cover=data.cover,
-            created_at=data.created_at,
+            *fields,
+            introduction=introduction or {},
+            comments={k: Comment.from_dict(v) for k, v in comments.items()} if comments else {},
+            cover=cover,
+            created_at=created_at,
         )
 
     def to_dict(self) -> dict:
         # 将对象转换为字典格式
-        return {
-            'id': self.id,
-            'name': self.name,
-            'contact': self.contact,
-            'gender': self.gender,
-            'age': self.age,
-            'height': self.height,
-            'marital_status': self.marital_status,
-            'match_requirement': self.match_requirement,
-            'introduction': self.introduction,
-            'comments': {k: v.to_dict() for k, v in self.comments.items()},
-            'cover': self.cover,
-            'created_at': int(self.created_at.timestamp()) if self.created_at else None,
-        }      
+        return dict(zip(_PEOPLE_KEYS, (
+            *_PEOPLE_GET(self),
+            {k: v.to_dict() for k, v in self.comments.items()},
+            self.cover,
+            _timestamp(self.created_at),
+        )))
 
     def to_rldb_model(self) -> PeopleRLDBModel:
-        # 将对象转换为关系数据库模型
-        return PeopleRLDBModel(
-            id=self.id,
-            name=self.name,
-            contact=self.contact,
-            gender=self.gender,
-            age=self.age,
-            height=self.height,
-            marital_status=self.marital_status,
-            match_requirement=self.match_requirement,
-            introduction=json.dumps(self.introduction, ensure_ascii=False),
-            comments=json.dumps({k: v.to_dict() for k, v in self.comments.items()}, ensure_ascii=False),
-            cover=self.cover,
-        )
+        # 将对象转换为关系数据库模型, 字段与 to_dict 相同但不含 created_at
+        return PeopleRLDBModel(**dict(zip(_PEOPLE_KEYS[:-1], (
+            *_PEOPLE_GET(self),
+            {k: v.to_dict() for k, v in self.comments.items()},
+            self.cover,
+        ))))
     
     def validate(self) -> error:
-        err = error(ErrorCode.SUCCESS, "")
-        if not self.name:
-            logging.error("Name is required, use default")
-            self.name = ""
-        if not self.gender in ['男', '女', '未知']:
-            logging.error("Gender must be '男', '女', or '未知', use default")
-            self.gender = "未知"
-        if not isinstance(self.age, int) or self.age < 0:
-            logging.error("Age must be an integer and greater than 0, use default")
-            self.age = 0
-        if not isinstance(self.height, int) or self.height < 0:
-            logging.error("Height must be an integer and greater than 0, use default")
-            self.height = 0
-        return err
+        # 非法字段逐一回退为默认值, 不中断校验
+        for attr, invalid, default, msg in _PEOPLE_RULES:
+            if invalid(getattr(self, attr)):
+                logging.error(msg)
+                setattr(self, attr, default)
+        return OK
+
+# from_dict 只接受的字段名, 导入时计算一次
+_PEOPLE_FIELDS = frozenset(People.__dataclass_fields__)
@@ -1,12 +1,13 @@
 
 
 
+import functools
 import logging
-import uuid
 from models.people import People, PeopleRLDBModel, Comment
 from datetime import datetime
-from utils.error import ErrorCode, error
+from utils.error import OK, ErrorCode, error
 from utils import rldb
+from utils.ids import next_id
 
 
 class PeopleService:
@@ -21,13 +22,13 @@ class PeopleService:
         :return: 人物ID
         """
         # 0. 生成 people id
-        people.id = people.id if people.id else uuid.uuid4().hex
+        people.id = people.id if people.id else next_id()
         
         # 1. 转换模型，并保存到 SQL 数据库
         people_orm = people.to_rldb_model()
         self.rldb.upsert(people_orm)
         
-        return people.id, error(ErrorCode.SUCCESS, "")
+        return people.id, OK
     
     def delete(self, people_id: str) -> error:
         """
@@ -40,7 +41,7 @@ class PeopleService:
         if not people_orm:
             return error(ErrorCode.RLDB_ERROR, f"people {people_id} not found")
         self.rldb.delete(people_orm)
-        return error(ErrorCode.SUCCESS, "")
+        return OK
     
     def get(self, people_id: str) -> (People, error):
         """
@@ -52,7 +53,7 @@ class PeopleService:
         people_orm = self.rldb.get(PeopleRLDBModel, people_id)
         if not people_orm:
             return None, error(ErrorCode.MODEL_ERROR, f"people {people_id} not found")
-        return People.from_rldb_model(people_orm), error(ErrorCode.SUCCESS, "")
+        return People.from_rldb_model(people_orm), OK
     
     def list(self, conds: dict = {}, limit: int = 10, offset: int = 0) -> (list[People], error):
         """
@@ -63,10 +64,10 @@ class PeopleService:
         :param offset: 分页偏移量
         :return: 人物对象列表
         """
-        people_orms = self.rldb.query(PeopleRLDBModel, **conds)
-        peoples = [People.from_rldb_model(people_orm) for people_orm in people_orms]
+        rows = self.rldb.query_mappings(PeopleRLDBModel, limit=limit, offset=offset, **conds)
+        peoples = [People.from_mapping(row) for row in rows]
         
-        return peoples, error(ErrorCode.SUCCESS, "")
+        return peoples, OK
 
     def save_remark(self, people_id: str, content: str) -> error:
         """
@@ -76,21 +77,23 @@ class PeopleService:
         :param content: 备注内容
         :return: 错误对象
         """
-        people: People
-        err: error
-        people, err = self.get(people_id)
-        logging.info(f"get people before save remark: {people}")
-        if not err.success:
-            return err
-        remark = people.comments.get("remark", None)
+        # 只读写 comments 字段, 不加载和回写整条记录
+        row = self.rldb.get_column(PeopleRLDBModel, people_id, "comments")
+        if row is None:
+            return error(ErrorCode.MODEL_ERROR, f"people {people_id} not found")
+        comments = row[0] or {}
+        remark = comments.get("remark", None)
+        now = datetime.now()
         if remark is not None:
+            remark = Comment.from_dict(remark)
             remark.content = content
-            remark.updated_at = datetime.now()
+            remark.updated_at = now
         else:
-            people.comments["remark"] = Comment(content=content)
-        logging.info(f"save remark for people {people}")
-        _, err = self.save(people)
-        return err
+            remark = Comment(content=content, created_at=now, updated_at=now)
+        comments["remark"] = remark.to_dict()
+        logging.debug("save remark for people %s: %s", people_id, remark)
+        self.rldb.update_columns(PeopleRLDBModel, people_id, comments=comments)
+        return OK
 
     def delete_remark(self, people_id: str) -> error:
         """
@@ -99,26 +102,23 @@ class PeopleService:
         :param people_id: 人物ID
         :return: 错误对象
         """
-        people: People
-        err: error
-        people, err = self.get(people_id)
-        if not err.success:
-            return err
+        row = self.rldb.get_column(PeopleRLDBModel, people_id, "comments")
+        if row is None:
+            return error(ErrorCode.MODEL_ERROR, f"people {people_id} not found")
 
-        if "remark" in people.comments:
-            del people.comments["remark"]
-            _, err = self.save(people)
-            return err
-        
-        return error(ErrorCode.SUCCESS, "")
+        comments = row[0] or {}
+        if "remark" in comments:
+            del comments["remark"]
+            self.rldb.update_columns(PeopleRLDBModel, people_id, comments=comments)
 
+        return OK
 
 
-people_service = None
+# 首次调用时创建, 之后直接返回缓存的实例; 依赖 rldb 已经初始化
+@functools.cache
+def get_instance() -> PeopleService:
+    return PeopleService()
 
+# 启动时提前创建实例, 尽早暴露初始化顺序问题
 def init():
-    global people_service
-    people_service = PeopleService()
-
-def get_instance() -> PeopleService:
-    return people_service
\ No newline at end of file
+    get_instance()
\ No newline at end of file
@@ -1,21 +1,19 @@
 
 from enum import Enum
-import logging
 from typing import Protocol
 
 class ErrorCode(Enum):
     SUCCESS = 0
     MODEL_ERROR = 1000
     RLDB_ERROR = 2100
+    OCR_ERROR = 3100
 
 class error(Protocol):
-    _error_code: int = 0
-    _error_info: str = ""
+    __slots__ = ('_error_code', '_error_info')
 
     def __init__(self, error_code: ErrorCode, error_info: str):
         self._error_code = int(error_code.value)
         self._error_info = error_info
-        logging.info(f"errorcode: {type(self._error_code)}")
     def __str__(self) -> str:
         return f"{self.__class__.__name__}({self._error_code}, {self._error_info})"
     
@@ -28,3 +26,6 @@ class error(Protocol):
     @property
     def success(self) -> bool:
         return self._error_code == 0
+
+# 成功结果不会被修改, 所有调用方共用同一个实例
+OK = error(ErrorCode.SUCCESS, "")
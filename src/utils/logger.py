@@ -74,6 +74,9 @@ def init():
     file_handler.setLevel(log_level)
     root_logger.addHandler(file_handler)
     
+    # 根日志记录器取两个处理器中较低的级别, 低于该级别的日志在调用处直接返回, 不再创建和格式化记录
+    root_logger.setLevel(min(console_handler.level, file_handler.level))
+    
     # 确保日志消息被正确处理
     logging.addLevelName(logging.DEBUG, "D")
     logging.addLevelName(logging.INFO, "I")
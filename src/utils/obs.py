@@ -1,11 +1,15 @@
 
 import json
 import logging
-from typing import Protocol
+import os
+from typing import BinaryIO, Protocol
 import qiniu
 import requests
 from .config import get_instance as get_config
 
+# 七牛断点续传的分块大小, 不超过一个分块的文件用一次表单上传即可, 超过时才分块上传
+_PUT_STREAM_THRESHOLD = 4 * 1024 * 1024
+
 
 class OBS(Protocol):
     def Put(self, obs_path: str, content: bytes) -> str:
@@ -21,6 +25,20 @@ class OBS(Protocol):
         """
         ...
     
+    def PutStream(self, obs_path: str, stream: BinaryIO, size: int = None) -> str:
+        """
+        以流的方式上传文件到OBS, 不需要把文件内容全部读入内存
+        
+        Args:
+            obs_path (str): OBS目标路径
+            stream (BinaryIO): 文件流
+            size (int, optional): 文件大小, 为空时从流中计算. Defaults to None.
+        
+        Returns:
+            str: OBS文件路径
+        """
+        ...
+    
     def Get(self, obs_path: str) -> bytes:
         """
         从OBS下载文件
@@ -96,11 +114,39 @@ class Koodo:
         full_path = f"{self.prefix_path}{obs_path}"
         token = self.auth.upload_token(self.bucket_name, full_path)
         ret, info = qiniu.put_data(token, full_path, content)
-        logging.debug(f"文件 {obs_path} 上传到 OBS, 结果: {ret}, 状态码: {info.status_code}, 错误信息: {info.text_body}")
+        return self._put_result(obs_path, full_path, ret, info)
+
+    def PutStream(self, obs_path: str, stream: BinaryIO, size: int = None) -> str:
+        """
+        以流的方式上传文件到OBS, 不超过一个分块(4MB)的文件单次上传, 更大的文件分块上传
+        
+        Args:
+            obs_path (str): OBS目标路径
+            stream (BinaryIO): 文件流
+            size (int, optional): 文件大小, 为空时从流中计算. Defaults to None.
+        
+        Returns:
+            str: OBS文件路径
+        """
+        if size is None:
+            size = stream.seek(0, os.SEEK_END)
+            stream.seek(0)
+        full_path = f"{self.prefix_path}{obs_path}"
+        token = self.auth.upload_token(self.bucket_name, full_path)
+        if size <= _PUT_STREAM_THRESHOLD:
+            # 小文件单次表单上传, put_data 会直接读取文件对象
+            ret, info = qiniu.put_data(token, full_path, stream)
+        else:
+            ret, info = qiniu.put_stream(token, full_path, stream, os.path.basename(obs_path), size)
+        return self._put_result(obs_path, full_path, ret, info)
+
+    def _put_result(self, obs_path: str, full_path: str, ret: dict, info) -> str:
+        # 处理上传结果, 成功时返回 OBS 文件路径, 失败时返回空字符串
+        logging.debug("文件 %s 上传到 OBS, 结果: %s, 状态码: %s, 错误信息: %s", obs_path, ret, info.status_code, info.text_body)
         if ret is None or info.status_code != 200:
-            logging.error(f"文件 {obs_path} 上传失败, 错误信息: {info.text_body}")
+            logging.error("文件 %s 上传失败, 错误信息: %s", obs_path, info.text_body)
             return ""
-        logging.info(f"文件 {obs_path} 上传成功, OBS路径: {full_path}")
+        logging.info("文件 %s 上传成功, OBS路径: %s", obs_path, full_path)
         return f"{self.outer_domain}/{full_path}"
 
     def Get(self, obs_path: str) -> bytes:
@@ -117,7 +163,7 @@ class Koodo:
         resp = requests.get(link)
         data = json.loads(resp.text)
         if 'error' in data and data['error']:
-            logging.error(f"从 OBS {obs_path} 下载文件失败, 错误信息: {data['error']}")
+            logging.error("从 OBS %s 下载文件失败, 错误信息: %s", obs_path, data['error'])
             return None
         return resp.content
     
@@ -154,11 +200,11 @@ class Koodo:
             bool: 是否删除成功
         """
         ret, info = self.bucket.delete(self.bucket_name, f"{self.prefix_path}{obs_path}")
-        logging.debug(f"文件 {obs_path} 删除 OBS, 结果: {ret}, 状态码: {info.status_code}, 错误信息: {info.text_body}")
+        logging.debug("文件 %s 删除 OBS, 结果: %s, 状态码: %s, 错误信息: %s", obs_path, ret, info.status_code, info.text_body)
         if ret is None or info.status_code != 200:
-            logging.error(f"文件 {obs_path} 删除 OBS 失败, 错误信息: {info.text_body}")
+            logging.error("文件 %s 删除 OBS 失败, 错误信息: %s", obs_path, info.text_body)
             return False
-        logging.info(f"文件 {obs_path} 删除 OBS 成功")
+        logging.info("文件 %s 删除 OBS 成功", obs_path)
         return True
     
     def Link(self, obs_path: str) -> str:
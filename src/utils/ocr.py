@@ -53,8 +53,8 @@ class AliOCR:
         recognize_general_request = ocr_models.RecognizeGeneralRequest(url=image_link)
         runtime = util_models.RuntimeOptions()
         try:
-            resp = self.client.recognize_general_with_options(recognize_general_request, runtime)
-            logging.debug(resp.body.data)
+            response = self.client.recognize_general_with_options(recognize_general_request, runtime)
+            logging.debug(response.body.data)
         except Exception as error:
             # 此处仅做打印展示，请谨慎对待异常处理，在工程项目中切勿直接忽略异常。
             # 错误 message
@@ -62,8 +62,8 @@ class AliOCR:
             # 诊断地址
             logging.error(error.data.get("Recommend"))
             UtilClient.assert_as_string(error.message)
+            return ""
         
-        response = self.client.recognize_general_with_options(recognize_general_request, runtime)
         if response.status_code == 200 and response.body:
             result_data = response.body.data
             result_body = json.loads(result_data)
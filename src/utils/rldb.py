@@ -1,16 +1,57 @@
 
+import functools
 from typing import Protocol
-import uuid
-from sqlalchemy import Column, DateTime, String, create_engine, func
+import orjson
+from sqlalchemy import Column, DateTime, String, Text, TypeDecorator, create_engine, func, select, update
 from sqlalchemy.orm import declarative_base, sessionmaker
 from .config import get_instance as get_config
+from .ids import next_id
 
 SQLAlchemyBase = declarative_base()
 
 
+class JSONText(TypeDecorator):
+    # 以 Text 存储的 JSON 字段, 由 orjson 序列化为不转义的 UTF-8
+    # 数据库按原文保存, 读出时字典的 key 顺序与写入时一致, 不受 MySQL 原生 JSON 类型排序 key 的影响
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return orjson.dumps(value).decode() if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return orjson.loads(value) if value else None
+
+
+# 同一个 DSN 只创建一次引擎和连接池, 建表检查也只做一次
+@functools.lru_cache(maxsize=None)
+def _create_engine(dsn: str):
+    config = get_config()
+    # 编译语句缓存的条目数, 默认 500 条, 模型和查询组合较多时可调大
+    query_cache_size = config.getint("sqlalchemy", "query_cache_size", fallback=1200)
+    pool_args = {}
+    if not dsn.startswith("sqlite"):
+        # 请求在默认线程池中访问数据库, 每个线程同一时刻最多占用一个连接,
+        # 连接池大小默认与线程池一致(见 web/api.py), 且不小于 SQLAlchemy 默认的 5 + 10
+        thread_pool_size = config.getint("web_service", "thread_pool_size", fallback=32)
+        pool_size = config.getint("sqlalchemy", "pool_size", fallback=max(5, thread_pool_size))
+        pool_args = {
+            "pool_size": pool_size,
+            "max_overflow": config.getint("sqlalchemy", "max_overflow", fallback=10),
+            "pool_timeout": config.getint("sqlalchemy", "pool_timeout", fallback=30),
+            "pool_recycle": config.getint("sqlalchemy", "pool_recycle", fallback=1800),
+            "pool_pre_ping": config.getboolean("sqlalchemy", "pool_pre_ping", fallback=True),
+        }
+    engine = create_engine(dsn,
+                           query_cache_size=query_cache_size,
+                           **pool_args)
+    SQLAlchemyBase.metadata.create_all(engine)
+    return engine
+
+
 class RLDBBaseModel(SQLAlchemyBase):
     __abstract__ = True
-    id = Column(String(36), primary_key=True, default=lambda: uuid.uuid4().hex)
+    id = Column(String(36), primary_key=True, default=next_id)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     deleted_at = Column(DateTime(timezone=True), nullable=True, index=True)
@@ -55,14 +96,36 @@ class RelationalDB(Protocol):
              ) -> list[RLDBBaseModel]:
         ...
 
+    def query_mappings(self,
+                       model: type[RLDBBaseModel],
+                       limit: int = None,
+                       offset: int = None,
+                       **filters
+                       ) -> list[dict]:
+        ...
+
+    def get_column(self,
+                   model: type[RLDBBaseModel],
+                   id: str,
+                   column: str,
+                   ):
+        ...
+
+    def update_columns(self,
+                       model: type[RLDBBaseModel],
+                       id: str,
+                       **values
+                       ) -> int:
+        ...
+
 
 class SqlAlchemyDB():
     def __init__(self, dsn: str = None) -> None:
         config = get_config()
         dsn = dsn if dsn else config.get("sqlalchemy", "database_dsn")
-        self.sqldb_engine = create_engine(dsn)
-        SQLAlchemyBase.metadata.create_all(self.sqldb_engine)
-        self.session_maker = sessionmaker(bind=self.sqldb_engine)
+        self.sqldb_engine = _create_engine(dsn)
+        # 提交后不让实例过期, 避免会话关闭后访问属性时再查一次库
+        self.session_maker = sessionmaker(bind=self.sqldb_engine, expire_on_commit=False)
 
     def insert(self, data: RLDBBaseModel) -> str:
         with self.session_maker() as session:
@@ -77,9 +140,9 @@ class SqlAlchemyDB():
             return data.id
 
     def upsert(self, data: RLDBBaseModel) -> str:
-        existed = data.id and data.id != "" and self.get(data.__class__, data.id) is not None
+        # merge 会按主键查找已有记录, 存在则更新, 不存在则插入, 无需预先 get 一次
         with self.session_maker() as session:
-            session.merge(data) if existed else session.add(data)
+            session.merge(data)
             session.commit()
             return data.id
 
@@ -93,11 +156,10 @@ class SqlAlchemyDB():
             model: type[RLDBBaseModel],
             id: str,
             ) -> RLDBBaseModel:
+        # 2.0 风格的 select 会命中引擎的编译缓存, 同结构的语句只编译一次
+        sel = select(model).where(model.id == id, model.deleted_at.is_(None))
         with self.session_maker() as session:
-            sel = session.query(model)
-            sel = sel.filter(model.id == id)
-            sel = sel.filter(model.deleted_at.is_(None))
-            result = sel.first()
+            result = session.scalars(sel).first()
         return result
 
     def query(self,
@@ -107,19 +169,61 @@ class SqlAlchemyDB():
              **filters
              ) -> list[RLDBBaseModel]:
         results: list[RLDBBaseModel] = []
+        # 在 SQL 中按创建时间倒序, 保证分页结果稳定
+        sel = select(model).where(model.deleted_at.is_(None))
+        if filters:
+            sel = sel.filter_by(**filters)
+        sel = sel.order_by(model.created_at.desc())
+        if limit:
+            sel = sel.limit(limit)
+        if offset:
+            sel = sel.offset(offset)
         with self.session_maker() as session:
-            sel = session.query(model)
-            sel = sel.filter(model.deleted_at.is_(None))
-            if filters:
-                sel = sel.filter_by(**filters)
-            if limit:
-                sel = sel.limit(limit)
-            if offset:
-                sel = sel.offset(offset)
-            results = sel.all()
-            results.sort(key=lambda x: x.created_at, reverse=True)
+            results = list(session.scalars(sel))
         return results
 
+    def query_mappings(self,
+                       model: type[RLDBBaseModel],
+                       limit: int = None,
+                       offset: int = None,
+                       **filters
+                       ) -> list[dict]:
+        # 只读场景直接用 Core select 取行映射, 跳过 ORM 实例构建和 identity map
+        table = model.__table__
+        sel = select(table).where(table.c.deleted_at.is_(None))
+        for key, value in filters.items():
+            sel = sel.where(table.c[key] == value)
+        sel = sel.order_by(table.c.created_at.desc())
+        if limit:
+            sel = sel.limit(limit)
+        if offset:
+            sel = sel.offset(offset)
+        with self.sqldb_engine.connect() as conn:
+            results = list(conn.execute(sel).mappings())
+        return results
+
+    def get_column(self,
+                   model: type[RLDBBaseModel],
+                   id: str,
+                   column: str,
+                   ):
+        # 只查询单个字段, 返回单列的行, 记录不存在时返回 None
+        table = model.__table__
+        sel = select(table.c[column]).where(table.c.id == id, table.c.deleted_at.is_(None))
+        with self.sqldb_engine.connect() as conn:
+            return conn.execute(sel).first()
+
+    def update_columns(self,
+                       model: type[RLDBBaseModel],
+                       id: str,
+                       **values
+                       ) -> int:
+        # 只更新指定字段, updated_at 由列的 onupdate 自动刷新, 返回受影响行数
+        table = model.__table__
+        stmt = update(table).where(table.c.id == id, table.c.deleted_at.is_(None)).values(**values)
+        with self.sqldb_engine.begin() as conn:
+            return conn.execute(stmt).rowcount
+
 _rldb_instance: RelationalDB = None
 
 def init(type: str = "sqlalchemy", dsn: str = None):
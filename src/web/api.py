@@ -1,16 +1,31 @@
 import os
 import uuid
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from typing import Any, Optional
 from fastapi import FastAPI, UploadFile, File, Query
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 from services.people import get_instance as get_people_service
 from models.people import People
-from agents.extract_people_agent import ExtractPeopleAgent
+from agents import base_agent
+from agents.extract_people_agent import get_instance as get_extract_people_agent
 from utils import obs, ocr
-
-api = FastAPI(title="Single People Management and Searching", version="0.1")
+from utils.error import ErrorCode
+from utils.config import get_instance as get_config
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 数据库、OBS、OCR 等阻塞调用都通过 asyncio.to_thread 放到默认线程池执行, 按配置调整线程池大小
+    pool_size = get_config().getint('web_service', 'thread_pool_size', fallback=32)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=pool_size))
+    yield
+    await base_agent.close()
+
+api = FastAPI(title="Single People Management and Searching", version="0.1", default_response_class=ORJSONResponse, lifespan=lifespan)
 api.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -33,7 +48,7 @@ class PostInputRequest(BaseModel):
 
 @api.post("/recognition/input")
 async def post_input(request: PostInputRequest):
-    people = extract_people(request.text)
+    people = await extract_people(request.text)
     resp = BaseResponse(error_code=0, error_info="success")
     resp.data = people.to_dict()
     return resp
@@ -52,27 +67,31 @@ async def post_input_image(image: UploadFile = File(...)):
     # 保存文件到对象存储
     file_path = f"uploads/{unique_filename}"
     obs_util = obs.get_instance()
-    obs_util.Put(file_path, await image.read())
+    await asyncio.to_thread(obs_util.PutStream, file_path, image.file, image.size)
     
     # 获取对象存储外链
     obs_url = obs_util.Link(file_path)
-    logging.info(f"obs_url: {obs_url}")
+    logging.info("obs_url: %s", obs_url)
     
     # 调用OCR处理图片
     ocr_util = ocr.get_instance()
-    ocr_result = ocr_util.recognize_image_text(obs_url)
-    logging.info(f"ocr_result: {ocr_result}")
+    ocr_result = await asyncio.to_thread(ocr_util.recognize_image_text, obs_url)
+    logging.debug("ocr_result: %s", ocr_result)
+    if not ocr_result:
+        # 识别失败或图片中没有文字, 直接报错, 不再把空文本交给大模型提取
+        logging.error("ocr recognize failed, url: %s", obs_url)
+        return BaseResponse(error_code=ErrorCode.OCR_ERROR.value, error_info="image text recognize failed")
     
-    people = extract_people(ocr_result, obs_url)
+    people = await extract_people(ocr_result, obs_url)
     resp = BaseResponse(error_code=0, error_info="success")
     resp.data = people.to_dict()
     return resp
 
-def extract_people(text: str, cover_link: str = None) -> People:
-    extra_agent = ExtractPeopleAgent()
-    people = extra_agent.extract_people_info(text)
+async def extract_people(text: str, cover_link: str = None) -> People:
+    extra_agent = get_extract_people_agent()
+    people = await extra_agent.extract_people_info(text)
     people.cover = cover_link
-    logging.info(f"people: {people}")
+    logging.debug("people: %s", people)
     return people
 
 class PostPeopleRequest(BaseModel):
@@ -80,24 +99,24 @@ class PostPeopleRequest(BaseModel):
 
 @api.post("/people")
 async def post_people(post_people_request: PostPeopleRequest):
-    logging.debug(f"post_people_request: {post_people_request}")
+    logging.debug("post_people_request: %s", post_people_request)
     people = People.from_dict(post_people_request.people)
     service = get_people_service()
-    people.id, error = service.save(people)
+    people.id, error = await asyncio.to_thread(service.save, people)
     if not error.success:
         return BaseResponse(error_code=error.code, error_info=error.info)
     return BaseResponse(error_code=0, error_info="success", data=people.id)
 
 @api.put("/people/{people_id}")
 async def update_people(people_id: str, post_people_request: PostPeopleRequest):
-    logging.debug(f"post_people_request: {post_people_request}")
+    logging.debug("post_people_request: %s", post_people_request)
     people = People.from_dict(post_people_request.people)
     people.id = people_id
     service = get_people_service()
-    res, error = service.get(people_id)
+    res, error = await asyncio.to_thread(service.get, people_id)
     if not error.success or not res:
         return BaseResponse(error_code=error.code, error_info=error.info)
-    _, error = service.save(people)
+    _, error = await asyncio.to_thread(service.save, people)
     if not error.success:
         return BaseResponse(error_code=error.code, error_info=error.info)
     return BaseResponse(error_code=0, error_info="success")
@@ -105,7 +124,7 @@ async def update_people(people_id: str, post_people_request: PostPeopleRequest):
 @api.delete("/people/{people_id}")
 async def delete_people(people_id: str):
     service = get_people_service()
-    error = service.delete(people_id)
+    error = await asyncio.to_thread(service.delete, people_id)
     if not error.success:
         return BaseResponse(error_code=error.code, error_info=error.info)
     return BaseResponse(error_code=0, error_info="success")
@@ -139,12 +158,12 @@ async def get_peoples(
     if marital_status:
         conds["marital_status"] = marital_status
     
-    logging.info(f"conds: , limit: {limit}, offset: {offset}")
+    logging.info("conds: %s, limit: %s, offset: %s", conds, limit, offset)
 
     results = []
     service = get_people_service()
-    results, error = service.list(conds, limit=limit, offset=offset)
-    logging.info(f"query results: {results}")
+    results, error = await asyncio.to_thread(service.list, conds, limit=limit, offset=offset)
+    logging.debug("query results: %s", results)
     if not error.success:
         return BaseResponse(error_code=error.code, error_info=error.info)
     peoples = [people.to_dict() for people in results]
@@ -158,7 +177,7 @@ class RemarkRequest(BaseModel):
 @api.post("/people/{people_id}/remark")
 async def post_remark(people_id: str, request: RemarkRequest):
     service = get_people_service()
-    error = service.save_remark(people_id, request.content)
+    error = await asyncio.to_thread(service.save_remark, people_id, request.content)
     if not error.success:
         return BaseResponse(error_code=error.code, error_info=error.info)
     return BaseResponse(error_code=0, error_info="success")
@@ -167,7 +186,7 @@ async def post_remark(people_id: str, request: RemarkRequest):
 @api.delete("/people/{people_id}/remark")
 async def delete_remark(people_id: str):
     service = get_people_service()
-    error = service.delete_remark(people_id)
+    error = await asyncio.to_thread(service.delete_remark, people_id)
     if not error.success:
         return BaseResponse(error_code=error.code, error_info=error.info)
     return BaseResponse(error_code=0, error_info="success")